@@ -1,503 +1,748 @@
-"""
-Google Search Console URL Indexing via API
-"""
-
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-import logging
-import csv
-import datetime
-from urllib.parse import urlparse
-import requests
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
-import os
-from functools import partial
-from typing import Dict, Optional, Any
-import time
-
-# Configuration
-INPUT_FILE = "urls.txt"
-JSON_KEY_FILES = [
-    "indexing.json",
-    "indexing2.json",
-    "indexing3.json",
-    "indexing4.json",
-    "indexing5.json"
-]
-SCOPES = ["https://www.googleapis.com/auth/indexing"]
-URL_LIMIT_PER_ACCOUNT = 200
-REQUEST_TIMEOUT = 30  # seconds
-
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler(f"indexing_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.log"),
-        logging.StreamHandler()
-    ]
-)
-logger = logging.getLogger(__name__)
-
-
-class URLIndexer:
-    """Handles Google Indexing API operations with proper error handling"""
-
-    def __init__(self):
-        self.date_str = datetime.datetime.now().strftime("%Y-%m-%d")
-        self.file_handlers: Dict[str, Dict[str, Any]] = {}
-        self.session = self._create_session()
-        self.unique_domains = set()
-        self._initialize_domains()
-
-    def _create_session(self) -> requests.Session:
-        """Create requests session with retry logic"""
-        session = requests.Session()
-        retry = Retry(
-            total=3,
-            backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["GET", "POST"]
-        )
-        adapter = HTTPAdapter(max_retries=retry)
-        session.mount("http://", adapter)
-        session.mount("https://", adapter)
-        return session
-
-    def _initialize_domains(self):
-        """Extract unique domains from input file"""
-        try:
-            with open(INPUT_FILE, "r", encoding="utf-8") as file:
-                for line in file:
-                    url = line.strip()
-                    if url:  # Skip empty lines
-                        try:
-                            domain = urlparse(url).netloc
-                            if domain:
-                                self.unique_domains.add(domain)
-                        except Exception as e:
-                            logger.error(f"Error parsing URL {url}: {e}")
-
-            # Initialize file handlers for each domain
-            for domain in self.unique_domains:
-                self.file_handlers[domain] = {
-                    "csv_file": None,
-                    "csv_writer": None,
-                    "file_index": 0
-                }
-
-            logger.info(f"Found {len(self.unique_domains)} unique domains")
-
-        except FileNotFoundError:
-            logger.error(f"Input file '{INPUT_FILE}' not found")
-            raise
-        except Exception as e:
-            logger.error(f"Error initializing domains: {e}")
-            raise
-
-    def _adjust_notify_time(self, notify_time: str) -> str:
-        """Adjust notification time to proper format"""
-        if '.' in notify_time:
-            parts = notify_time.split('.')
-            if len(parts) > 1 and len(parts[1]) > 6:
-                # Truncate microseconds to 6 digits
-                notify_time = f"{parts[0]}.{parts[1][:6]}Z"
-        return notify_time
-
-    def _insert_event(
-            self,
-            request_id: str,
-            response: Dict,
-            exception: Optional[Exception],
-            domain: str,
-            url: str,
-            status_code: int,
-            service_account: str,
-            action_type: str
-    ):
-        """
-        Callback function to handle API response and write to CSV
-
-        Args:
-            request_id: Request identifier
-            response: API response
-            exception: Exception if request failed
-            domain: Domain name
-            url: URL being processed
-            status_code: HTTP status code
-            service_account: Service account name
-            action_type: "URL_UPDATED" or "URL_DELETED"
-        """
-        if exception is not None:
-            logger.error(f"API error for {url}: {exception}")
-            csv_writer = self.file_handlers.get(domain, {}).get("csv_writer")
-            if csv_writer:
-                csv_writer.writerow([
-                    url,
-                    status_code,
-                    "API_ERROR",
-                    "N/A",
-                    datetime.datetime.now().strftime("%Y-%m-%d"),
-                    service_account
-                ])
-                self._flush_csv(domain)
-            return
-
-        logger.info(f"API success for {url}: {response}")
-
-        csv_writer = self.file_handlers.get(domain, {}).get("csv_writer")
-        if csv_writer is None:
-            logger.warning(f"No CSV writer found for domain {domain}")
-            return
-
-        try:
-            # Use the action_type passed in, not from response
-            status = action_type
-            notify_time_readable = "N/A"
-
-            # Try to extract notification time if available
-            url_metadata = response.get("urlNotificationMetadata", {})
-            notify_time = ""
-
-            # Check for both possible fields
-            if "latestUpdate" in url_metadata:
-                notify_time = url_metadata["latestUpdate"].get("notifyTime", "")
-            elif "latestRemove" in url_metadata:
-                notify_time = url_metadata["latestRemove"].get("notifyTime", "")
-
-            if notify_time:
-                try:
-                    notify_time = self._adjust_notify_time(notify_time)
-                    # Remove 'Z' and parse
-                    dt = datetime.datetime.fromisoformat(notify_time.rstrip('Z'))
-                    notify_time_readable = dt.strftime("%Y-%m-%d %H:%M:%S")
-                except (ValueError, AttributeError) as e:
-                    logger.warning(f"Could not parse notify_time '{notify_time}': {e}")
-
-            date_now = datetime.datetime.now().strftime("%Y-%m-%d")
-
-            # Write to CSV
-            csv_writer.writerow([
-                url,
-                status_code,
-                status,
-                notify_time_readable,
-                date_now,
-                service_account
-            ])
-
-            # Flush immediately to prevent data loss
-            self._flush_csv(domain)
-
-        except Exception as e:
-            logger.error(f"Error processing response for {url}: {e}", exc_info=True)
-
-    def _flush_csv(self, domain: str):
-        """Flush CSV file to disk"""
-        csv_file = self.file_handlers.get(domain, {}).get("csv_file")
-        if csv_file and not csv_file.closed:
-            try:
-                csv_file.flush()
-                os.fsync(csv_file.fileno())
-            except Exception as e:
-                logger.error(f"Error flushing CSV for domain {domain}: {e}")
-
-    def _get_csv_writer(self, domain: str) -> Optional[csv.writer]:
-        """Get or create CSV writer for domain"""
-        handler = self.file_handlers.get(domain)
-        if not handler:
-            logger.error(f"No handler found for domain {domain}")
-            return None
-
-        # Check if we need to create a new file
-        if handler["csv_writer"] is None or (
-                handler["csv_file"] and handler["csv_file"].closed
-        ):
-            handler["file_index"] += 1
-            csv_filename = f"{domain}_{self.date_str}_{handler['file_index']}.csv"
-
-            # Ensure unique filename
-            while os.path.exists(csv_filename):
-                handler["file_index"] += 1
-                csv_filename = f"{domain}_{self.date_str}_{handler['file_index']}.csv"
-
-            try:
-                csv_file = open(csv_filename, "a", newline="", encoding="utf-8")
-                csv_writer = csv.writer(csv_file)
-
-                # Write header
-                csv_writer.writerow([
-                    "URL",
-                    "Status Code",
-                    "Status",
-                    "Notify Date",
-                    "Date",
-                    "Service Account"
-                ])
-
-                handler["csv_file"] = csv_file
-                handler["csv_writer"] = csv_writer
-
-                logger.info(f"Created CSV file: {csv_filename}")
-
-            except (PermissionError, IOError) as e:
-                logger.error(f"Error creating CSV file for domain {domain}: {e}")
-                handler["csv_file"] = None
-                handler["csv_writer"] = None
-                return None
-
-        return handler["csv_writer"]
-
-    def _check_url_status(self, url: str) -> int:
-        """Check URL status with proper error handling"""
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-            }
-            response = self.session.get(
-                url,
-                headers=headers,
-                allow_redirects=True,
-                timeout=REQUEST_TIMEOUT
-            )
-            return response.status_code
-        except requests.RequestException as e:
-            logger.error(f"Error checking URL {url}: {e}")
-            return 0  # Return 0 for network errors
-
-    def _load_credentials(self, json_file: str) -> Optional[service_account.Credentials]:
-        """Load service account credentials"""
-        try:
-            if not os.path.exists(json_file):
-                logger.error(f"Credentials file not found: {json_file}")
-                return None
-
-            credentials = service_account.Credentials.from_service_account_file(
-                json_file,
-                scopes=SCOPES
-            )
-            logger.info(f"Loaded credentials from {json_file}")
-            return credentials
-
-        except Exception as e:
-            logger.error(f"Error loading credentials from {json_file}: {e}")
-            return None
-
-    def submit_urls(self):
-        """Main function to submit URLs to Google Indexing API"""
-        url_processed = 0
-        credentials_index = 0
-        total_urls = 0
-        successful_submissions = 0
-        failed_submissions = 0
-
-        # Load initial credentials
-        credentials = self._load_credentials(JSON_KEY_FILES[credentials_index])
-        if not credentials:
-            logger.error("Failed to load initial credentials")
-            return
-
-        try:
-            service = build('indexing', 'v3', credentials=credentials)
-        except Exception as e:
-            logger.error(f"Error building API service: {e}")
-            return
-
-        # Load URLs
-        try:
-            with open(INPUT_FILE, "r", encoding="utf-8") as file:
-                urls = [line.strip() for line in file if line.strip()]
-            total_urls = len(urls)
-            logger.info(f"Processing {total_urls} URLs")
-        except Exception as e:
-            logger.error(f"Error reading input file: {e}")
-            return
-
-        # Process each URL
-        for idx, url in enumerate(urls, 1):
-            # Check if we need to switch accounts
-            if url_processed >= URL_LIMIT_PER_ACCOUNT:
-                credentials_index += 1
-                if credentials_index >= len(JSON_KEY_FILES):
-                    logger.warning("All service accounts exhausted")
-                    break
-
-                credentials = self._load_credentials(JSON_KEY_FILES[credentials_index])
-                if not credentials:
-                    logger.error("Failed to load next credentials, stopping")
-                    break
-
-                try:
-                    service = build('indexing', 'v3', credentials=credentials)
-                    url_processed = 0
-                    logger.info(f"Switched to service account: {JSON_KEY_FILES[credentials_index]}")
-                except Exception as e:
-                    logger.error(f"Error building API service: {e}")
-                    break
-
-            # Extract domain and service account name
-            try:
-                domain = urlparse(url).netloc
-                if not domain:
-                    logger.warning(f"Invalid URL, skipping: {url}")
-                    continue
-            except Exception as e:
-                logger.error(f"Error parsing URL {url}: {e}")
-                continue
-
-            service_account = JSON_KEY_FILES[credentials_index].replace(".json", "")
-
-            # Get CSV writer
-            csv_writer = self._get_csv_writer(domain)
-            if csv_writer is None:
-                logger.error(f"Could not get CSV writer for {domain}, skipping {url}")
-                failed_submissions += 1
-                continue
-
-            # Check URL status
-            logger.info(f"[{idx}/{total_urls}] Checking URL: {url}")
-            status_code = self._check_url_status(url)
-
-            if status_code == 0:
-                logger.warning(f"Could not reach URL: {url}")
-                csv_writer.writerow([
-                    url,
-                    0,
-                    "UNREACHABLE",
-                    "N/A",
-                    datetime.datetime.now().strftime("%Y-%m-%d"),
-                    service_account
-                ])
-                self._flush_csv(domain)
-                failed_submissions += 1
-                continue
-
-            # Determine action based on status code
-            try:
-                if 200 <= status_code <= 299:
-                    action_type = "URL_UPDATED"
-                    logger.info(f"Status {status_code} - Submitting URL_UPDATED for: {url}")
-
-                    # Use partial to capture current values
-                    callback = partial(
-                        self._insert_event,
-                        domain=domain,
-                        url=url,
-                        status_code=status_code,
-                        service_account=service_account,
-                        action_type=action_type
-                    )
-
-                    batch = service.new_batch_http_request(callback=callback)
-                    batch.add(service.urlNotifications().publish(
-                        body={"url": url, "type": "URL_UPDATED"}
-                    ))
-                    batch.execute()
-                    successful_submissions += 1
-
-                elif 400 <= status_code <= 499:
-                    action_type = "URL_DELETED"
-                    logger.info(f"Status {status_code} - Submitting URL_DELETED for: {url}")
-
-                    callback = partial(
-                        self._insert_event,
-                        domain=domain,
-                        url=url,
-                        status_code=status_code,
-                        service_account=service_account,
-                        action_type=action_type
-                    )
-
-                    batch = service.new_batch_http_request(callback=callback)
-                    batch.add(service.urlNotifications().publish(
-                        body={"url": url, "type": "URL_DELETED"}
-                    ))
-                    batch.execute()
-                    successful_submissions += 1
-
-                else:
-                    logger.info(f"Skipping URL due to status {status_code}: {url}")
-                    csv_writer.writerow([
-                        url,
-                        status_code,
-                        "URL_SKIPPED",
-                        "N/A",
-                        datetime.datetime.now().strftime("%Y-%m-%d"),
-                        service_account
-                    ])
-                    self._flush_csv(domain)
-                    failed_submissions += 1
-
-                url_processed += 1
-
-                # Small delay to avoid rate limiting
-                time.sleep(0.1)
-
-            except HttpError as e:
-                logger.error(f"Google API error for {url}: {e}")
-                csv_writer.writerow([
-                    url,
-                    status_code,
-                    "API_ERROR",
-                    "N/A",
-                    datetime.datetime.now().strftime("%Y-%m-%d"),
-                    service_account
-                ])
-                self._flush_csv(domain)
-                failed_submissions += 1
-
-            except Exception as e:
-                logger.error(f"Unexpected error processing {url}: {e}", exc_info=True)
-                csv_writer.writerow([
-                    url,
-                    status_code,
-                    "ERROR",
-                    "N/A",
-                    datetime.datetime.now().strftime("%Y-%m-%d"),
-                    service_account
-                ])
-                self._flush_csv(domain)
-                failed_submissions += 1
-
-        # Print summary
-        logger.info("=" * 60)
-        logger.info("PROCESSING COMPLETE")
-        logger.info(f"Total URLs: {total_urls}")
-        logger.info(f"Successful submissions: {successful_submissions}")
-        logger.info(f"Failed/Skipped: {failed_submissions}")
-        logger.info("=" * 60)
-
-    def cleanup(self):
-        """Close all open CSV files"""
-        logger.info("Cleaning up resources...")
-        for domain, handler in self.file_handlers.items():
-            if handler["csv_file"] and not handler["csv_file"].closed:
-                try:
-                    handler["csv_file"].close()
-                    logger.info(f"Closed CSV file for domain: {domain}")
-                except Exception as e:
-                    logger.error(f"Error closing CSV for domain {domain}: {e}")
-
-
-def main():
-    """Main entry point"""
-    indexer = None
-    try:
-        logger.info("Starting Google Indexing API submission")
-        indexer = URLIndexer()
-        indexer.submit_urls()
-    except KeyboardInterrupt:
-        logger.warning("Process interrupted by user")
-    except Exception as e:
-        logger.error(f"Fatal error: {e}", exc_info=True)
-    finally:
-        if indexer:
-            indexer.cleanup()
-        logger.info("Script finished")
-
-
-if __name__ == "__main__":
-
-    main()
+"""
+Google Search Console URL Indexing via API
+"""
+
+import logging
+import csv
+import datetime
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Optional, Any, TYPE_CHECKING
+import time
+
+if TYPE_CHECKING:
+    from google.oauth2 import service_account
+
+# The googleapiclient/google-auth stack costs a few hundred ms to import,
+# so it is loaded lazily at first use rather than at module import time.
+
+# Configuration
+INPUT_FILE = "urls.txt"
+JSON_KEY_FILES = [
+    "indexing.json",
+    "indexing2.json",
+    "indexing3.json",
+    "indexing4.json",
+    "indexing5.json"
+]
+SCOPES = ["https://www.googleapis.com/auth/indexing"]
+URL_LIMIT_PER_ACCOUNT = 200
+REQUEST_TIMEOUT = 30  # seconds
+PROBE_WORKERS = 64  # concurrent URL status checks
+PROBE_WINDOW = PROBE_WORKERS * 2  # in-flight status checks while streaming
+BATCH_SIZE = 100  # Google's documented limit per batch HTTP request
+API_RATE_LIMIT = 10  # Indexing API submissions per second
+ROW_QUEUE_SIZE = 10000  # per-domain CSV row queue capacity
+ROW_QUEUE_TIMEOUT = 30  # seconds to wait before dropping a row
+ROW_BATCH_SIZE = 100  # rows written per writerows call
+
+# Signals a domain's writer thread to drain its queue and exit
+_QUEUE_SENTINEL = object()
+
+# Setup logging; the log file only records problems so the per-URL flow
+# does not pay a file write per line
+_file_handler = logging.FileHandler(
+    f"indexing_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+)
+_file_handler.setLevel(logging.WARNING)
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    handlers=[
+        _file_handler,
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+
+def _netloc(url: str) -> str:
+    """Extract the network location from a URL"""
+    return urlparse(url).netloc
+
+
+# Characters that force a field through csv.writer's quoting path
+_CSV_SPECIAL = ('"', ',', '\n', '\r')
+
+
+def _format_row(row: tuple) -> Optional[str]:
+    """Format a CSV line manually, or None if any field needs quoting"""
+    fields = [str(field) for field in row]
+    for field in fields:
+        if any(ch in field for ch in _CSV_SPECIAL):
+            return None
+    return ",".join(fields) + "\r\n"
+
+
+class TokenBucket:
+    """Token-bucket rate limiter that only blocks when quota is exhausted"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def acquire(self, tokens: float = 1.0):
+        """Take tokens from the bucket, sleeping until enough accumulate"""
+        while True:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity,
+                self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return
+            time.sleep((tokens - self.tokens) / self.rate)
+
+
+class URLIndexer:
+    """Handles Google Indexing API operations with proper error handling"""
+
+    def __init__(self):
+        self.date_str = datetime.datetime.now().strftime("%Y-%m-%d")
+        self.file_handlers: Dict[str, Dict[str, Any]] = {}
+        self.session = self._create_session()
+        self._bucket = TokenBucket(rate=API_RATE_LIMIT, capacity=API_RATE_LIMIT)
+        self.unique_domains = set()
+        self.total_urls = 0
+        self.services = []  # one Indexing API service per key file
+        self.successful_submissions = 0
+        self.failed_submissions = 0
+        self._initialize_domains()
+
+    def _create_session(self) -> requests.Session:
+        """Create requests session with retry logic"""
+        session = requests.Session()
+        # Probes only need the status code, so retry just transient
+        # throttling (429/503) with short backoff instead of the old
+        # 1s/2s/4s schedule on every 5xx
+        retry = Retry(
+            total=2,
+            backoff_factor=0.2,
+            status_forcelist=[429, 503],
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            respect_retry_after_header=True
+        )
+        adapter = HTTPAdapter(
+            max_retries=retry,
+            pool_connections=PROBE_WORKERS,
+            pool_maxsize=PROBE_WORKERS,
+            pool_block=True
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _initialize_domains(self):
+        """Count URLs and extract unique domains from input file in one pass"""
+        try:
+            with open(INPUT_FILE, "r", encoding="utf-8") as file:
+                for line in file:
+                    url = line.strip()
+                    if url:  # Skip empty lines
+                        try:
+                            domain = _netloc(url)
+                            if domain:
+                                self.unique_domains.add(domain)
+                                self.total_urls += 1
+                            else:
+                                logger.warning(f"Invalid URL, skipping: {url}")
+                        except Exception as e:
+                            logger.error(f"Error parsing URL {url}: {e}")
+
+            # Scan the working directory once instead of stat-ing candidate
+            # filenames per domain in _get_csv_writer
+            existing_files = {
+                entry.name for entry in os.scandir(".") if entry.is_file()
+            }
+
+            # Initialize file handlers for each domain
+            for domain in self.unique_domains:
+                self.file_handlers[domain] = {
+                    "csv_file": None,
+                    "csv_writer": None,
+                    "file_index": self._last_file_index(domain, existing_files),
+                    "queue": queue.Queue(maxsize=ROW_QUEUE_SIZE),
+                    "writer_thread": None
+                }
+
+            logger.info(f"Found {len(self.unique_domains)} unique domains")
+
+        except FileNotFoundError:
+            logger.error(f"Input file '{INPUT_FILE}' not found")
+            raise
+        except Exception as e:
+            logger.error(f"Error initializing domains: {e}")
+            raise
+
+    def _insert_event(
+            self,
+            request_id: str,
+            response: Dict,
+            exception: Optional[Exception],
+            domain: str,
+            url: str,
+            status_code: int,
+            service_account: str,
+            action_type: str
+    ):
+        """
+        Callback function to handle API response and write to CSV
+
+        Args:
+            request_id: Request identifier
+            response: API response
+            exception: Exception if request failed
+            domain: Domain name
+            url: URL being processed
+            status_code: HTTP status code
+            service_account: Service account name
+            action_type: "URL_UPDATED" or "URL_DELETED"
+        """
+        if exception is not None:
+            logger.error("API error for %s: %s", url, exception)
+            self.failed_submissions += 1
+            self._queue_row(domain, (
+                url,
+                status_code,
+                "API_ERROR",
+                "N/A",
+                self.date_str,
+                service_account
+            ))
+            return
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("API success for %s: %s", url, response)
+        self.successful_submissions += 1
+
+        try:
+            # Use the action_type passed in, not from response
+            status = action_type
+            notify_time_readable = "N/A"
+
+            # Try to extract notification time if available
+            url_metadata = response.get("urlNotificationMetadata", {})
+            notify_time = ""
+
+            # Check for both possible fields
+            if "latestUpdate" in url_metadata:
+                notify_time = url_metadata["latestUpdate"].get("notifyTime", "")
+            elif "latestRemove" in url_metadata:
+                notify_time = url_metadata["latestRemove"].get("notifyTime", "")
+
+            if notify_time:
+                # The API returns fixed-format ISO-8601
+                # ("2024-01-02T15:04:05.123456Z"), so slice out the date and
+                # time instead of round-tripping through a datetime object
+                if len(notify_time) >= 19 and notify_time[10] == "T":
+                    notify_time_readable = (
+                        notify_time[:10] + " " + notify_time[11:19]
+                    )
+                else:
+                    logger.warning("Could not parse notify_time '%s'", notify_time)
+
+            self._queue_row(domain, (
+                url,
+                status_code,
+                status,
+                notify_time_readable,
+                self.date_str,
+                service_account
+            ))
+
+        except Exception as e:
+            logger.error("Error processing response for %s: %s", url, e, exc_info=True)
+
+    def _queue_row(self, domain: str, row: tuple):
+        """Queue a CSV row for a domain; its writer thread drains in batches"""
+        handler = self.file_handlers.get(domain)
+        if handler is None:
+            logger.error("No handler found for domain %s", domain)
+            return
+
+        # Start the domain's dedicated writer thread on first row so idle
+        # domains never spawn one
+        if handler["writer_thread"] is None:
+            thread = threading.Thread(
+                target=self._writer_loop, args=(domain,), daemon=True
+            )
+            handler["writer_thread"] = thread
+            thread.start()
+
+        try:
+            # Bounded wait so a dead writer thread cannot hang the producer
+            handler["queue"].put(row, timeout=ROW_QUEUE_TIMEOUT)
+        except queue.Full:
+            logger.error("Row queue full for domain %s, dropping row", domain)
+
+    def _writer_loop(self, domain: str):
+        """Drain a domain's row queue and write batches until sentinel"""
+        handler = self.file_handlers[domain]
+        row_queue = handler["queue"]
+
+        while True:
+            row = row_queue.get()
+            if row is _QUEUE_SENTINEL:
+                return
+
+            # Opportunistically gather whatever else is already queued
+            batch = [row]
+            done = False
+            while len(batch) < ROW_BATCH_SIZE:
+                try:
+                    row = row_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if row is _QUEUE_SENTINEL:
+                    done = True
+                    break
+                batch.append(row)
+
+            # Never let a write error kill the thread: producers would
+            # block forever once the bounded queue fills
+            try:
+                csv_writer = self._get_csv_writer(domain)
+                if csv_writer is None:
+                    logger.error("Dropping %d rows for domain %s",
+                                 len(batch), domain)
+                else:
+                    self._write_rows(handler, csv_writer, batch)
+            except Exception as e:
+                logger.error("Error writing %d rows for domain %s: %s",
+                             len(batch), domain, e)
+
+            if done:
+                return
+
+    @staticmethod
+    def _write_rows(handler, csv_writer, batch):
+        """Write a batch of rows, bypassing csv.writer for plain fields
+
+        Fields in this data almost never contain commas or quotes, so
+        rows are joined manually and written in one call; any row that
+        does need quoting falls back to csv.writer.
+        """
+        csv_file = handler["csv_file"]
+        lines = []
+        for row in batch:
+            line = _format_row(row)
+            if line is None:
+                # Preserve row order around the quoted fallback
+                if lines:
+                    csv_file.write("".join(lines))
+                    lines.clear()
+                csv_writer.writerow(row)
+            else:
+                lines.append(line)
+        if lines:
+            csv_file.write("".join(lines))
+
+    def _sync_csv(self, domain: str):
+        """Flush buffered rows and force the CSV file to disk"""
+        csv_file = self.file_handlers.get(domain, {}).get("csv_file")
+        if csv_file and not csv_file.closed:
+            try:
+                csv_file.flush()
+                os.fsync(csv_file.fileno())
+            except Exception as e:
+                logger.error(f"Error flushing CSV for domain {domain}: {e}")
+
+    def _last_file_index(self, domain: str, existing_files: set) -> int:
+        """Find the highest index used by this domain's CSVs from prior runs"""
+        prefix = f"{domain}_{self.date_str}_"
+        last_index = 0
+        for name in existing_files:
+            if name.startswith(prefix) and name.endswith(".csv"):
+                index = name[len(prefix):-len(".csv")]
+                if index.isdigit():
+                    last_index = max(last_index, int(index))
+        return last_index
+
+    def _get_csv_writer(self, domain: str) -> Optional[csv.writer]:
+        """Get or create CSV writer for domain"""
+        handler = self.file_handlers.get(domain)
+        if not handler:
+            logger.error(f"No handler found for domain {domain}")
+            return None
+
+        # Check if we need to create a new file
+        if handler["csv_writer"] is None or (
+                handler["csv_file"] and handler["csv_file"].closed
+        ):
+            # file_index was seeded past any pre-existing files at startup
+            handler["file_index"] += 1
+            csv_filename = f"{domain}_{self.date_str}_{handler['file_index']}.csv"
+
+            try:
+                csv_file = open(
+                    csv_filename, "a", newline="", encoding="utf-8",
+                    buffering=1 << 20
+                )
+                csv_writer = csv.writer(csv_file)
+
+                # Write header
+                csv_writer.writerow([
+                    "URL",
+                    "Status Code",
+                    "Status",
+                    "Notify Date",
+                    "Date",
+                    "Service Account"
+                ])
+
+                handler["csv_file"] = csv_file
+                handler["csv_writer"] = csv_writer
+
+                logger.info(f"Created CSV file: {csv_filename}")
+
+            except (PermissionError, IOError) as e:
+                logger.error(f"Error creating CSV file for domain {domain}: {e}")
+                handler["csv_file"] = None
+                handler["csv_writer"] = None
+                return None
+
+        return handler["csv_writer"]
+
+    def _check_url_status(self, url: str) -> int:
+        """Check URL status with proper error handling"""
+        try:
+            headers = {
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+            }
+            # HEAD transfers only headers; the body is never needed for a
+            # status probe
+            response = self.session.head(
+                url,
+                headers=headers,
+                allow_redirects=True,
+                timeout=REQUEST_TIMEOUT
+            )
+
+            if response.status_code == 405:
+                # Some servers reject HEAD; fall back to a GET without
+                # reading the body
+                response = self.session.get(
+                    url,
+                    headers=headers,
+                    allow_redirects=True,
+                    timeout=REQUEST_TIMEOUT,
+                    stream=True
+                )
+                response.close()
+
+            return response.status_code
+        except requests.RequestException as e:
+            logger.error("Error checking URL %s: %s", url, e)
+            return 0  # Return 0 for network errors
+
+    def _load_credentials(self, json_file: str) -> Optional["service_account.Credentials"]:
+        """Load service account credentials"""
+        from google.oauth2 import service_account
+
+        try:
+            if not os.path.exists(json_file):
+                logger.error(f"Credentials file not found: {json_file}")
+                return None
+
+            credentials = service_account.Credentials.from_service_account_file(
+                json_file,
+                scopes=SCOPES
+            )
+            logger.info(f"Loaded credentials from {json_file}")
+            return credentials
+
+        except Exception as e:
+            logger.error(f"Error loading credentials from {json_file}: {e}")
+            return None
+
+    def _build_service(self, json_file: str):
+        """Build an Indexing API service for one service account file"""
+        from googleapiclient.discovery import build
+
+        credentials = self._load_credentials(json_file)
+        if not credentials:
+            return None
+
+        try:
+            # static_discovery skips the discovery-document fetch entirely
+            return build(
+                'indexing', 'v3',
+                credentials=credentials,
+                cache_discovery=False,
+                static_discovery=True
+            )
+        except Exception as e:
+            logger.error(f"Error building API service for {json_file}: {e}")
+            return None
+
+    def submit_urls(self):
+        """Main function to submit URLs to Google Indexing API"""
+        credentials_index = 0
+        self.successful_submissions = 0
+        self.failed_submissions = 0
+
+        # Build all account services up front (in parallel) so account
+        # switches in the hot loop are a plain list lookup
+        with ThreadPoolExecutor(max_workers=len(JSON_KEY_FILES)) as ex:
+            self.services = list(ex.map(self._build_service, JSON_KEY_FILES))
+
+        service = self.services[credentials_index]
+        if service is None:
+            logger.error("Failed to load initial credentials")
+            return
+
+        # URLs were counted once in _initialize_domains
+        total_urls = self.total_urls
+        logger.info(f"Processing {total_urls} URLs")
+
+        # Probe URL statuses concurrently; the workload is I/O-bound, so the
+        # thread pool overlaps network round-trips while the main thread
+        # drains results in order and handles the API submissions. The input
+        # file is streamed rather than materialized, so memory stays flat
+        # regardless of list size.
+        executor = ThreadPoolExecutor(max_workers=PROBE_WORKERS)
+        probe_stream = self._probe_stream(self._iter_url_records(), executor)
+
+        try:
+            self._process_urls(probe_stream, service, credentials_index,
+                               total_urls)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        # Print summary
+        logger.info("=" * 60)
+        logger.info("PROCESSING COMPLETE")
+        logger.info(f"Total URLs: {total_urls}")
+        logger.info(f"Successful submissions: {self.successful_submissions}")
+        logger.info(f"Failed/Skipped: {self.failed_submissions}")
+        logger.info("=" * 60)
+
+    def _iter_url_records(self):
+        """Stream (url, domain) pairs from the input file"""
+        with open(INPUT_FILE, "r", encoding="utf-8") as file:
+            for line in file:
+                url = line.strip()
+                if not url:
+                    continue
+                try:
+                    # Re-parsing here is ~1µs per URL, noise next to the
+                    # network round-trips, and avoids caching every URL
+                    domain = _netloc(url)
+                except Exception:
+                    continue  # already logged in _initialize_domains
+                if domain:
+                    yield url, domain
+
+    def _probe_stream(self, url_records, executor):
+        """Yield ((url, domain), status_code) with a bounded probe window
+
+        A deque of at most PROBE_WINDOW in-flight checks keeps the pool
+        saturated without pulling the whole input stream into memory.
+        """
+        window = deque()
+        for record in url_records:
+            window.append(
+                (record, executor.submit(self._check_url_status, record[0]))
+            )
+            if len(window) >= PROBE_WINDOW:
+                record, future = window.popleft()
+                yield record, future.result()
+        while window:
+            record, future = window.popleft()
+            yield record, future.result()
+
+    def _process_urls(self, probe_stream, service, credentials_index,
+                      total_urls):
+        """Submit URLs to the Indexing API as their status checks complete"""
+        url_processed = 0
+        pending = []
+
+        for idx, ((url, domain), status_code) in enumerate(probe_stream, 1):
+            # Check if we need to switch accounts
+            if url_processed >= URL_LIMIT_PER_ACCOUNT:
+                # Flush queued requests under the account that queued them
+                self._submit_batch(service, pending)
+
+                credentials_index += 1
+                if credentials_index >= len(JSON_KEY_FILES):
+                    logger.warning("All service accounts exhausted")
+                    break
+
+                service = self.services[credentials_index]
+                if service is None:
+                    logger.error("Next service account unavailable, stopping")
+                    break
+
+                url_processed = 0
+                logger.info(f"Switched to service account: {JSON_KEY_FILES[credentials_index]}")
+
+            service_account = JSON_KEY_FILES[credentials_index].replace(".json", "")
+
+            logger.info("[%d/%d] Checked URL: %s", idx, total_urls, url)
+
+            if status_code == 0:
+                logger.warning("Could not reach URL: %s", url)
+                self._queue_row(domain, (
+                    url,
+                    0,
+                    "UNREACHABLE",
+                    "N/A",
+                    self.date_str,
+                    service_account
+                ))
+                self.failed_submissions += 1
+                continue
+
+            # Determine action based on status code
+            if 200 <= status_code <= 299:
+                action_type = "URL_UPDATED"
+            elif 400 <= status_code <= 499:
+                action_type = "URL_DELETED"
+            else:
+                logger.info("Skipping URL due to status %d: %s", status_code, url)
+                self._queue_row(domain, (
+                    url,
+                    status_code,
+                    "URL_SKIPPED",
+                    "N/A",
+                    self.date_str,
+                    service_account
+                ))
+                self.failed_submissions += 1
+                continue
+
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Status %d - Queueing %s for: %s",
+                             status_code, action_type, url)
+            pending.append({
+                "url": url,
+                "domain": domain,
+                "action_type": action_type,
+                "status_code": status_code,
+                "service_account": service_account
+            })
+            url_processed += 1
+
+            if len(pending) >= BATCH_SIZE:
+                self._submit_batch(service, pending)
+
+        # Flush whatever is left after the last full batch
+        self._submit_batch(service, pending)
+
+    def _submit_batch(self, service, pending):
+        """Submit queued publish requests as a single batch HTTP request"""
+        from googleapiclient.errors import HttpError
+
+        if not pending:
+            return
+
+        try:
+            batch = service.new_batch_http_request()
+            # Build the resource object once per batch; each
+            # urlNotifications() call constructs a fresh Resource
+            url_notifications = service.urlNotifications()
+            for item in pending:
+                batch.add(
+                    url_notifications.publish(
+                        body={"url": item["url"], "type": item["action_type"]}
+                    ),
+                    callback=partial(
+                        self._insert_event,
+                        domain=item["domain"],
+                        url=item["url"],
+                        status_code=item["status_code"],
+                        service_account=item["service_account"],
+                        action_type=item["action_type"]
+                    )
+                )
+
+            # One token per batch round-trip keeps us under quota without
+            # the fixed per-URL sleep the old loop paid unconditionally
+            self._bucket.acquire()
+            batch.execute()
+
+        except HttpError as e:
+            logger.error(f"Google API error for batch of {len(pending)} URLs: {e}")
+            self._record_batch_failure(pending, "API_ERROR")
+
+        except Exception as e:
+            logger.error(f"Unexpected error submitting batch: {e}", exc_info=True)
+            self._record_batch_failure(pending, "ERROR")
+
+        finally:
+            pending.clear()
+
+    def _record_batch_failure(self, pending, status: str):
+        """Queue a CSV row for every URL in a batch that failed wholesale"""
+        for item in pending:
+            self._queue_row(item["domain"], (
+                item["url"],
+                item["status_code"],
+                status,
+                "N/A",
+                self.date_str,
+                item["service_account"]
+            ))
+        self.failed_submissions += len(pending)
+
+    def cleanup(self):
+        """Drain writer threads, then flush and close all open CSV files"""
+        logger.info("Cleaning up resources...")
+
+        # Stop each domain's writer thread after it has drained its queue
+        for domain, handler in self.file_handlers.items():
+            thread = handler["writer_thread"]
+            if thread is not None and thread.is_alive():
+                try:
+                    handler["queue"].put(_QUEUE_SENTINEL,
+                                         timeout=ROW_QUEUE_TIMEOUT)
+                except queue.Full:
+                    logger.error(f"Row queue for {domain} stuck full, "
+                                 f"abandoning its writer thread")
+                    continue
+                thread.join(timeout=30)
+                if thread.is_alive():
+                    logger.error(f"Writer thread for {domain} did not finish")
+
+        for domain, handler in self.file_handlers.items():
+            if handler["csv_file"] and not handler["csv_file"].closed:
+                try:
+                    self._sync_csv(domain)
+                    handler["csv_file"].close()
+                    logger.info(f"Closed CSV file for domain: {domain}")
+                except Exception as e:
+                    logger.error(f"Error closing CSV for domain {domain}: {e}")
+
+
+def main():
+    """Main entry point"""
+    indexer = None
+    try:
+        logger.info("Starting Google Indexing API submission")
+        indexer = URLIndexer()
+        indexer.submit_urls()
+    except KeyboardInterrupt:
+        logger.warning("Process interrupted by user")
+    except Exception as e:
+        logger.error(f"Fatal error: {e}", exc_info=True)
+    finally:
+        if indexer:
+            indexer.cleanup()
+        logger.info("Script finished")
+
+
+if __name__ == "__main__":
+
+    main()